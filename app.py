@@ -71,6 +71,10 @@ if "messages" not in st.session_state:
 if "selected_tool" not in st.session_state:
     st.session_state.selected_tool = "auto"
 
+# Uploads already ingested, so reruns don't re-process (or resurrect deleted) files
+if "processed_files" not in st.session_state:
+    st.session_state.processed_files = set()
+
 # Sidebar
 with st.sidebar:
     st.title("AI Research Assistant")
@@ -98,7 +102,7 @@ with st.sidebar:
     uploaded_file = st.file_uploader("Upload a document", type=["pdf", "txt"])
     collection_name = "default"  # Always use default collection
 
-    if uploaded_file is not None:
+    if uploaded_file is not None and uploaded_file.file_id not in st.session_state.processed_files:
         try:
             # Create uploads directory if it doesn't exist
             os.makedirs("uploads", exist_ok=True)
@@ -110,11 +114,42 @@ with st.sidebar:
             
             # Process the document
             with st.spinner("Processing document..."):
-                agent.process_document(file_path, collection_name)
+                stats = agent.process_document(file_path, collection_name)
+                st.session_state.processed_files.add(uploaded_file.file_id)
+                st.session_state.last_ingest_stats = stats
                 st.success("Document processed successfully!")
+                if stats["duplicates_skipped"]:
+                    st.caption(
+                        f"Collapsed {stats['duplicates_skipped']} near-duplicate chunks "
+                        f"({stats['chars_saved']:,} characters, ~{stats['embedding_seconds_saved']:.1f}s of embedding saved)"
+                    )
         except Exception as e:
             st.error(f"Error processing document: {str(e)}")
 
+    # Stored documents
+    try:
+        documents = agent.list_documents(collection_name)
+    except Exception:
+        documents = []
+
+    if documents:
+        selected_document = st.selectbox("Stored documents", options=documents, format_func=os.path.basename)
+        if st.button("Delete Document"):
+            try:
+                agent.delete_document(selected_document, collection_name)
+                st.success(f"Deleted {os.path.basename(selected_document)}")
+            except Exception as e:
+                st.error(f"Error deleting document: {str(e)}")
+
+        # Compaction copies the whole collection, so it is only run on request
+        if st.button("Compact Storage"):
+            try:
+                with st.spinner("Compacting collection..."):
+                    agent.compact_collection(collection_name)
+                st.success("Collection compacted")
+            except Exception as e:
+                st.error(f"Error compacting collection: {str(e)}")
+
 # Main content
 st.title("AI Research Assistant")
 st.markdown("---")
@@ -139,28 +174,8 @@ if prompt := st.chat_input("What would you like to know?"):
     with st.chat_message("assistant"):
         try:
             with st.spinner("Thinking..."):
-                if st.session_state.selected_tool == "auto":
-                    result = agent.execute_query(prompt, collection_name)
-                else:
-                    tool = agent.tools[st.session_state.selected_tool]
-                    context = agent.rag_pipeline.generate_response(prompt, collection_name)
-                    if st.session_state.selected_tool == "generate_report":
-                        result_text = tool.execute(
-                            topic=prompt,
-                            context=context,
-                            collection_name=collection_name
-                        )
-                    else:
-                        result_text = tool.execute(
-                            content=context,
-                            query=prompt,
-                            collection_name=collection_name
-                        )
-                    result = {
-                        "tool_used": st.session_state.selected_tool,
-                        "context": context,
-                        "result": result_text
-                    }
+                tool_name = None if st.session_state.selected_tool == "auto" else st.session_state.selected_tool
+                result = agent.execute_query(prompt, collection_name, tool_name=tool_name)
                 
                 # Display response
                 st.markdown(result["result"])
@@ -176,6 +191,13 @@ if prompt := st.chat_input("What would you like to know?"):
 
 # Sidebar utilities
 with st.sidebar:
+    with st.expander("Retrieval Metrics"):
+        st.json(agent.get_metrics())
+
+    if "last_ingest_stats" in st.session_state:
+        with st.expander("Last Upload Deduplication"):
+            st.json(st.session_state.last_ingest_stats)
+
     # Clear chat button
     if st.button("Clear Chat"):
         st.session_state.messages = []
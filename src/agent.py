@@ -9,7 +9,10 @@ from .tools.generate_report import GenerateReportTool
 from .tools.search_web import SearchWebTool
 
 class Agent:
-    def __init__(self):
+    # Tools that work on the document as a whole and so bypass the relevance gate
+    DOCUMENT_TOOLS = ("summarize", "extract_kpis", "generate_report")
+
+    def __init__(self, relevance_threshold: float = RAGPipeline.DEFAULT_RELEVANCE_THRESHOLD):
         load_dotenv()
         
         # Initialize Gemini
@@ -37,19 +40,22 @@ class Agent:
         )
         
         # Initialize RAG pipeline
-        self.rag_pipeline = RAGPipeline()
+        self.rag_pipeline = RAGPipeline(relevance_threshold=relevance_threshold)
         
         # Initialize tools
         self.tools = {
             "summarize": SummarizeTool(),
             "extract_kpis": ExtractKPIsTool(),
             "generate_report": GenerateReportTool(),
-            "search_web": SearchWebTool()
+            "search_web": SearchWebTool(
+                vector_store=self.rag_pipeline.vector_store,
+                document_processor=self.rag_pipeline.document_processor
+            )
         }
 
-    def process_document(self, file_path: str, collection_name: str):
-        """Process and store a document in the vector database."""
-        self.rag_pipeline.process_and_store_document(file_path, collection_name)
+    def process_document(self, file_path: str, collection_name: str) -> Dict[str, Any]:
+        """Process and store a document in the vector database, returning ingestion stats."""
+        return self.rag_pipeline.process_and_store_document(file_path, collection_name)
 
     def select_tool(self, query: str) -> str:
         """Select the most appropriate tool based on the query."""
@@ -72,13 +78,36 @@ class Agent:
             return "summarize"  # Default to summarize if tool selection fails
         return selected_tool
 
-    def execute_query(self, query: str, collection_name: str) -> Dict[str, Any]:
+    def execute_query(self, query: str, collection_name: str, tool_name: Optional[str] = None) -> Dict[str, Any]:
         """Execute a query using the most appropriate tool and RAG pipeline."""
         # First, get relevant context from RAG
-        context = self.rag_pipeline.generate_response(query, collection_name)
-        
-        # Select appropriate tool
-        tool_name = self.select_tool(query)
+        results = self.rag_pipeline.retrieve(query, collection_name)
+
+        # Empty collection: only the web can answer, so skip the generation and,
+        # in auto mode, the tool selection call
+        if not results["documents"]:
+            if tool_name in (None, "search_web"):
+                self.rag_pipeline.record_saved_calls(1 if tool_name else 2)
+                return self._search_web(query, collection_name)
+            self.rag_pipeline.record_saved_calls(2)
+            return {
+                "tool_used": tool_name,
+                "context": "",
+                "result": self.rag_pipeline.NO_CONTEXT_MESSAGE
+            }
+
+        # Select the tool before generating any context: only the document tools
+        # use it, so a web search skips the generation call
+        if tool_name is None:
+            tool_name = self.select_tool(query)
+        if tool_name not in self.DOCUMENT_TOOLS:
+            self.rag_pipeline.record_saved_calls(1)
+            return self._search_web(query, collection_name)
+
+        # Document-level tools (summaries, KPIs, reports) run on the top chunks
+        # even when nothing passed the relevance gate, since task-style queries
+        # carry little topical wording
+        context = self.rag_pipeline.generate_response(query, collection_name, results=results, gate=False)
         tool = self.tools[tool_name]
         
         # Execute tool with correct arguments
@@ -101,14 +130,42 @@ class Agent:
             "result": result_text
         }
 
+    def _search_web(self, query: str, collection_name: str) -> Dict[str, Any]:
+        """Answer a query from the web without document context."""
+        return {
+            "tool_used": "search_web",
+            "context": "",
+            "result": self.tools["search_web"].execute(
+                content="",
+                query=query,
+                collection_name=collection_name
+            )
+        }
+
     def list_collections(self) -> List[str]:
         """List all available collections."""
         return self.rag_pipeline.list_collections()
 
+    def list_documents(self, collection_name: str) -> List[str]:
+        """List the source documents stored in a collection."""
+        return self.rag_pipeline.list_documents(collection_name)
+
+    def delete_document(self, file_path: str, collection_name: str) -> int:
+        """Delete a single document from a collection."""
+        return self.rag_pipeline.delete_document(file_path, collection_name)
+
+    def compact_collection(self, collection_name: str) -> int:
+        """Reclaim space left behind by deleted documents."""
+        return self.rag_pipeline.compact_collection(collection_name)
+
     def delete_collection(self, collection_name: str):
         """Delete a collection."""
         self.rag_pipeline.delete_collection(collection_name)
 
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get retrieval gate metrics."""
+        return self.rag_pipeline.get_metrics()
+
     def get_available_tools(self) -> Dict[str, str]:
         """Get list of available tools and their descriptions."""
         return {name: str(tool) for name, tool in self.tools.items()} 
\ No newline at end of file
@@ -0,0 +1,115 @@
+import hashlib
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set
+
+FINGERPRINT_BITS = 64
+# Fingerprints are split into this many bands for lookup. Two fingerprints within
+# MAX_DISTANCE bits of each other must agree exactly on at least one band, so only
+# chunks sharing a band are ever compared.
+BANDS = 4
+MAX_DISTANCE = 3
+# SimHash only shortlists candidates; a match is confirmed on the texts themselves
+MIN_JACCARD = 0.95
+
+_BAND_BITS = FINGERPRINT_BITS // BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+_WORD_RE = re.compile(r"\w+")
+_NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)*")
+
+
+def _features(text: str) -> Counter:
+    """Word 3-shingles of the normalized text, falling back to words for short text."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < 3:
+        return Counter(words)
+    return Counter(" ".join(words[i:i + 3]) for i in range(len(words) - 2))
+
+
+def simhash(text: str) -> int:
+    """Compute a 64-bit SimHash fingerprint of a text chunk."""
+    weights = [0] * FINGERPRINT_BITS
+    for feature, count in _features(text).items():
+        # blake2b rather than hash() so fingerprints are stable across processes
+        h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += count if h >> bit & 1 else -count
+    return sum(1 << bit for bit in range(FINGERPRINT_BITS) if weights[bit] > 0)
+
+
+def is_near_duplicate(text: str, other: str, min_jaccard: float = MIN_JACCARD) -> bool:
+    """Confirm a SimHash candidate against the actual texts.
+
+    Every number must match exactly, so chunks that differ only in a figure
+    (EPS, revenue, share counts) are never collapsed, and the word 3-shingles
+    must overlap almost completely.
+    """
+    if _NUMBER_RE.findall(text) != _NUMBER_RE.findall(other):
+        return False
+    shingles, other_shingles = set(_features(text)), set(_features(other))
+    if not shingles and not other_shingles:
+        return text.strip() == other.strip()
+    return len(shingles & other_shingles) / len(shingles | other_shingles) >= min_jaccard
+
+
+def band_keys(fingerprint: int) -> List[int]:
+    """Split a fingerprint into the band keys used to look up candidates."""
+    return [(fingerprint >> (band * _BAND_BITS)) & _BAND_MASK for band in range(BANDS)]
+
+
+def to_hex(fingerprint: int) -> str:
+    """Encode a fingerprint for storage in chunk metadata."""
+    return f"{fingerprint:016x}"
+
+
+def from_hex(value: str) -> int:
+    """Decode a fingerprint stored in chunk metadata."""
+    return int(value, 16)
+
+
+class SimHashIndex:
+    """Banded in-memory lookup of chunk fingerprints for near-duplicate detection.
+
+    Meant for a small working set, such as one ingestion batch and the stored
+    chunks that share a band with it; a whole collection is looked up through
+    the band keys stored in chunk metadata instead.
+    """
+
+    def __init__(self, max_distance: int = MAX_DISTANCE):
+        self.max_distance = max_distance
+        self.fingerprints: Dict[str, int] = {}
+        self.bands = [dict() for _ in range(BANDS)]
+
+    def __len__(self) -> int:
+        return len(self.fingerprints)
+
+    def add(self, chunk_id: str, fingerprint: int):
+        """Index a chunk's fingerprint."""
+        self.fingerprints[chunk_id] = fingerprint
+        for band, key in zip(self.bands, band_keys(fingerprint)):
+            band.setdefault(key, set()).add(chunk_id)
+
+    def remove(self, chunk_ids: Iterable[str]):
+        """Drop chunks from the index, ignoring unknown IDs."""
+        for chunk_id in chunk_ids:
+            fingerprint = self.fingerprints.pop(chunk_id, None)
+            if fingerprint is None:
+                continue
+            for band, key in zip(self.bands, band_keys(fingerprint)):
+                ids = band.get(key)
+                if ids is not None:
+                    ids.discard(chunk_id)
+                    if not ids:
+                        del band[key]
+
+    def candidates(self, fingerprint: int, exclude: Optional[Set[str]] = None) -> List[str]:
+        """Return the IDs of indexed chunks within max_distance bits, closest first."""
+        found = {}
+        for band, key in zip(self.bands, band_keys(fingerprint)):
+            for chunk_id in band.get(key, ()):
+                if chunk_id in found or (exclude and chunk_id in exclude):
+                    continue
+                distance = bin(fingerprint ^ self.fingerprints[chunk_id]).count("1")
+                if distance <= self.max_distance:
+                    found[chunk_id] = distance
+        return sorted(found, key=found.get)
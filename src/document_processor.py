@@ -1,9 +1,12 @@
 import PyPDF2
-from typing import List, Dict
+from typing import List, Dict, Iterable, Iterator
 import os
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 
 class DocumentProcessor:
+    # Characters read from disk per step when streaming; must stay well above chunk_size
+    READ_BLOCK_SIZE = 1024 * 1024
+
     def __init__(self):
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=1000,
@@ -31,6 +34,52 @@ class DocumentProcessor:
         """Split text into chunks using langchain's text splitter."""
         return self.text_splitter.split_text(text)
 
+    def iter_chunks(self, blocks: Iterable[str]) -> Iterator[str]:
+        """Chunk a stream of text blocks, keeping overlap correct across block boundaries.
+
+        Only a bounded tail of text is held between blocks: everything up to the
+        start of the last (possibly incomplete) chunk is emitted, and that chunk is
+        re-split together with the next block.
+        """
+        buffer = ''
+        for block in blocks:
+            if not block:
+                continue
+            buffer += block
+            chunks = self.chunk_text(buffer)
+            if len(chunks) < 2:
+                continue
+            # Carry the raw text of the last chunk (it already contains the overlap
+            # with the chunk before it) so the next split starts from there.
+            tail_start = buffer.rfind(chunks[-1])
+            if tail_start <= 0:
+                continue
+            yield from chunks[:-1]
+            buffer = buffer[tail_start:]
+        if buffer:
+            yield from self.chunk_text(buffer)
+
+    def iter_txt_chunks(self, file_path: str) -> Iterator[str]:
+        """Stream chunks from a TXT file without loading it into memory."""
+        with open(file_path, 'r', encoding='utf-8') as file:
+            yield from self.iter_chunks(iter(lambda: file.read(self.READ_BLOCK_SIZE), ''))
+
+    def iter_pdf_chunks(self, file_path: str) -> Iterator[str]:
+        """Stream chunks from a PDF file one page at a time."""
+        with open(file_path, 'rb') as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            yield from self.iter_chunks(page.extract_text() for page in pdf_reader.pages)
+
+    def iter_document_chunks(self, file_path: str) -> Iterator[str]:
+        """Stream chunks from a document based on its file extension."""
+        _, ext = os.path.splitext(file_path)
+        if ext.lower() == '.pdf':
+            return self.iter_pdf_chunks(file_path)
+        elif ext.lower() == '.txt':
+            return self.iter_txt_chunks(file_path)
+        else:
+            raise ValueError(f"Unsupported file format: {ext}")
+
     def process_document(self, file_path: str) -> List[str]:
         """Process a document based on its file extension."""
         _, ext = os.path.splitext(file_path)
@@ -1,13 +1,39 @@
 import google.generativeai as genai
-from typing import List, Dict
+from typing import List, Dict, Any, Optional
 import os
+import uuid
 from dotenv import load_dotenv
 from .vector_store import VectorStore
 from .document_processor import DocumentProcessor
 
 class RAGPipeline:
-    def __init__(self):
+    NO_CONTEXT_MESSAGE = "The uploaded documents do not contain information relevant to this question."
+
+    # Squared L2 distance above which a chunk is treated as irrelevant, used for
+    # collections too small to calibrate. It suits Chroma's all-MiniLM-L6-v2 embeddings
+    # (unit vectors, so the range is 0-4 and 1.2 is a cosine similarity of about 0.4).
+    DEFAULT_RELEVANCE_THRESHOLD = 1.2
+
+    def __init__(self, relevance_threshold: float = DEFAULT_RELEVANCE_THRESHOLD, min_results: int = 5,
+                 max_results: int = 15, score_spread: float = 0.1, calibration_sample_size: int = 50,
+                 calibration_percentile: float = 0.9):
         load_dotenv()
+
+        self.relevance_threshold = relevance_threshold
+
+        # Per-collection thresholds calibrated from the collection itself: the
+        # given percentile of the distance from sampled chunks to their
+        # min_results-th nearest neighbour, i.e. how close related content in
+        # this collection actually sits. See calibrate_threshold().
+        self.calibration_sample_size = calibration_sample_size
+        self.calibration_percentile = calibration_percentile
+        self.thresholds: Dict[str, float] = {}
+
+        # Adaptive k: always send up to min_results chunks, and extend towards
+        # max_results only while scores stay within score_spread of the best match.
+        self.min_results = min_results
+        self.max_results = max_results
+        self.score_spread = score_spread
         
         # Configure Gemini with API key
         api_key = os.getenv('GOOGLE_API_KEY')
@@ -41,26 +67,122 @@ class RAGPipeline:
         self.vector_store = VectorStore()
         self.document_processor = DocumentProcessor()
 
-    def process_and_store_document(self, file_path: str, collection_name: str):
-        """Process a document and store it in the vector database."""
-        # Process the document into chunks
-        chunks = self.document_processor.process_document(file_path)
-        
-        # Store chunks in vector store
-        self.vector_store.add_documents(
+        # Retrieval gate counters, see get_metrics()
+        self.metrics = {
+            "queries": 0,
+            "relevant_queries": 0,
+            "chunks_sent": 0,
+            "gate_bypassed": 0,
+            "model_calls_saved": 0,
+        }
+
+    def process_and_store_document(self, file_path: str, collection_name: str) -> Dict[str, Any]:
+        """Process a document and store it in the vector database, returning ingestion stats."""
+        # Stream chunks straight into the vector store in fixed-size batches so
+        # peak memory does not grow with the file size. Re-uploading a source
+        # replaces only that document's chunks.
+        chunks = self.document_processor.iter_document_chunks(file_path)
+        stats = self.vector_store.replace_document(
             collection_name=collection_name,
+            source=file_path,
             documents=chunks,
-            metadata=[{"source": file_path} for _ in chunks]
+            metadata={"source": file_path},
+            id_prefix=uuid.uuid4().hex
         )
+        # The collection changed, so its score distribution may have too
+        self.calibrate_threshold(collection_name)
+        return stats
+
+    def calibrate_threshold(self, collection_name: str) -> float:
+        """Calibrate a collection's relevance threshold from its nearest-neighbour distances.
+
+        Falls back to relevance_threshold when the collection is too small to
+        sample. Returns the threshold now in use for the collection.
+        """
+        distances = sorted(self.vector_store.neighbour_distances(
+            collection_name,
+            sample_size=self.calibration_sample_size,
+            k=self.min_results
+        ))
+        if len(distances) < self.min_results:
+            threshold = self.relevance_threshold
+        else:
+            threshold = distances[min(len(distances) - 1, int(self.calibration_percentile * len(distances)))]
+        self.thresholds[collection_name] = threshold
+        return threshold
+
+    def get_threshold(self, collection_name: str) -> float:
+        """Get the relevance threshold for a collection, calibrating it on first use."""
+        if collection_name not in self.thresholds:
+            return self.calibrate_threshold(collection_name)
+        return self.thresholds[collection_name]
+
+    def retrieve(self, query: str, collection_name: str) -> Dict[str, Any]:
+        """Retrieve the chunks relevant to a query, gated by distance.
+
+        Returns the vector store result trimmed to relevant chunks, plus a
+        "relevant" flag. When nothing passes the threshold the flag is False and
+        the plain top results are returned, for callers that work on the
+        document as a whole; an empty collection returns no documents.
+        """
+        self.metrics["queries"] += 1
+        empty = {"documents": [], "metadatas": [], "distances": [], "relevant": False}
+
+        available = self.vector_store.count(collection_name)
+        if available == 0:
+            return empty
 
-    def generate_response(self, query: str, collection_name: str) -> str:
-        """Generate a response using RAG."""
-        # Retrieve relevant chunks
         results = self.vector_store.query(
             collection_name=collection_name,
-            query_text=query
+            query_text=query,
+            n_results=min(self.max_results, available)
         )
 
+        threshold = self.get_threshold(collection_name)
+        distances = results["distances"]
+        keep = 0
+        for i, distance in enumerate(distances):
+            if distance > threshold:
+                break
+            if i >= self.min_results and distance - distances[0] > self.score_spread:
+                break
+            keep = i + 1
+
+        if keep == 0:
+            return {
+                "documents": results["documents"][:self.min_results],
+                "metadatas": results["metadatas"][:self.min_results],
+                "distances": distances[:self.min_results],
+                "relevant": False
+            }
+
+        self.metrics["relevant_queries"] += 1
+        self.metrics["chunks_sent"] += keep
+        return {
+            "documents": results["documents"][:keep],
+            "metadatas": results["metadatas"][:keep],
+            "distances": distances[:keep],
+            "relevant": True
+        }
+
+    def generate_response(self, query: str, collection_name: str, results: Optional[Dict[str, Any]] = None,
+                          gate: bool = True) -> str:
+        """Generate a response using RAG.
+
+        With gate=False the top chunks are used even when none passed the
+        relevance threshold.
+        """
+        # Retrieve relevant chunks unless the caller already did
+        if results is None:
+            results = self.retrieve(query, collection_name)
+
+        # Skip the model call entirely when there is nothing to ground it on
+        if not results["documents"] or (gate and not results["relevant"]):
+            self.record_saved_calls(1)
+            return self.NO_CONTEXT_MESSAGE
+        if not results["relevant"]:
+            self.metrics["gate_bypassed"] += 1
+
         # Construct prompt with context
         context = "\n".join(results["documents"])
         prompt = f"""Based on the following context, please answer the question. 
@@ -85,10 +207,38 @@ class RAGPipeline:
         except Exception as e:
             return f"Error generating response: {str(e)}"
 
+    def record_saved_calls(self, count: int):
+        """Record model calls avoided because retrieval found nothing relevant."""
+        self.metrics["model_calls_saved"] += count
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get retrieval gate metrics, including the hit rate."""
+        metrics = dict(self.metrics)
+        queries = metrics["queries"]
+        metrics["hit_rate"] = metrics["relevant_queries"] / queries if queries else 0.0
+        metrics["avg_chunks_sent"] = metrics["chunks_sent"] / metrics["relevant_queries"] if metrics["relevant_queries"] else 0.0
+        metrics["thresholds"] = dict(self.thresholds)
+        return metrics
+
     def list_collections(self) -> List[str]:
         """List all available collections."""
         return self.vector_store.client.list_collections()
 
+    def list_documents(self, collection_name: str) -> List[str]:
+        """List the source documents stored in a collection."""
+        return self.vector_store.list_documents(collection_name)
+
+    def delete_document(self, file_path: str, collection_name: str) -> int:
+        """Delete a single document's chunks from a collection."""
+        removed = self.vector_store.delete_document(collection_name, file_path)
+        self.calibrate_threshold(collection_name)
+        return removed
+
+    def compact_collection(self, collection_name: str) -> int:
+        """Reclaim space left behind by deleted documents."""
+        return self.vector_store.compact_collection(collection_name)
+
     def delete_collection(self, collection_name: str):
         """Delete a collection."""
-        self.vector_store.delete_collection(collection_name) 
\ No newline at end of file
+        self.vector_store.delete_collection(collection_name)
+        self.thresholds.pop(collection_name, None) 
\ No newline at end of file
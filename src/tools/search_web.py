@@ -1,16 +1,32 @@
-import requests
 from .base_tool import BaseTool
+import logging
 import os
-from typing import List, Dict
+import uuid
+from typing import List, Dict, Optional
 from dotenv import load_dotenv
 import google.generativeai as genai
+from ..web_search import WebFetcher
+from ..vector_store import VectorStore
+from ..document_processor import DocumentProcessor
+
+logger = logging.getLogger(__name__)
 
 class SearchWebTool(BaseTool):
-    def __init__(self):
+    # Collection holding chunks of fetched web pages, keyed by URL
+    WEB_COLLECTION = "web_pages"
+
+    def __init__(self, fetcher: Optional[WebFetcher] = None, vector_store: Optional[VectorStore] = None,
+                 document_processor: Optional[DocumentProcessor] = None, max_pages: int = 5):
         super().__init__(
             name="search_web",
-            description="Fetches recent web results using Gemini's knowledge"
+            description="Fetches recent web results and answers from them"
         )
+
+        # Web retrieval goes through the same chunk/embed/rank path as uploads
+        self.fetcher = fetcher or WebFetcher()
+        self.vector_store = vector_store or VectorStore()
+        self.document_processor = document_processor or DocumentProcessor()
+        self.max_pages = max_pages
         
         # Configure Gemini
         load_dotenv()
@@ -41,13 +57,56 @@ class SearchWebTool(BaseTool):
             safety_settings=safety_settings
         )
 
+    def retrieve(self, query: str, n_results: int = 5) -> List[Dict]:
+        """Search the web and return the page chunks most relevant to the query."""
+        pages = self.fetcher.search_and_fetch(query, self.max_pages)
+        if not pages:
+            return []
+
+        self.vector_store.create_collection(self.WEB_COLLECTION)
+        for page in pages:
+            # Unchanged pages that are already embedded are not embedded again
+            if page["from_cache"] and self.vector_store.has_document(self.WEB_COLLECTION, page["url"]):
+                continue
+            # Dedup stays off here: a chunk collapsed onto another URL would be
+            # hidden by the per-URL filter below whenever that URL is not a result
+            self.vector_store.replace_document(
+                collection_name=self.WEB_COLLECTION,
+                source=page["url"],
+                documents=self.document_processor.iter_chunks([page["text"]]),
+                metadata={"source": page["url"]},
+                id_prefix=uuid.uuid4().hex,
+                deduplicate=False
+            )
+
+        results = self.vector_store.query(
+            collection_name=self.WEB_COLLECTION,
+            query_text=query,
+            n_results=n_results,
+            where={"source": {"$in": [page["url"] for page in pages]}}
+        )
+        return [
+            {"url": metadata["source"], "text": document}
+            for document, metadata in zip(results["documents"], results["metadatas"])
+        ]
+
     def execute(self, query: str, **kwargs) -> str:
         """
-        Use Gemini to answer the user's query directly, as accurately and informatively as possible.
+        Answer the user's query from freshly fetched web pages, falling back to Gemini's own knowledge.
         """
-        prompt = f"""Answer the following question as accurately and informatively as possible, using your latest knowledge:\n\nQuestion: {query}\n\nIf you do not know the answer or your knowledge may be outdated, say so clearly."""
+        try:
+            results = self.retrieve(query)
+        except Exception:
+            logger.exception("Web retrieval failed, answering from model knowledge")
+            results = []
+
+        if results:
+            sources = "\n\n".join(f"[{r['url']}]\n{r['text']}" for r in results)
+            prompt = f"""Answer the following question using the web search results below.\n\nQuestion: {query}\n\nSearch Results:\n{sources}\n\nCite the URLs you used. If the results do not answer the question, say so clearly."""
+        else:
+            prompt = f"""Answer the following question as accurately and informatively as possible, using your latest knowledge:\n\nQuestion: {query}\n\nIf you do not know the answer or your knowledge may be outdated, say so clearly."""
         try:
             response = self.model.generate_content(prompt)
             return response.text
         except Exception as e:
-            return f"Error processing search request: {str(e)}" 
\ No newline at end of file
+            return f"Error processing search request: {str(e)}"
\ No newline at end of file
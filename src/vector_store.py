@@ -1,16 +1,39 @@
 import chromadb
 from chromadb.config import Settings
 import os
-from typing import List, Dict, Optional
+import json
+import time
+import hashlib
+import uuid
+from itertools import islice
+from typing import List, Dict, Optional, Iterable, Iterator, Set, Any, Callable
+from .dedup import BANDS, SimHashIndex, band_keys, simhash, is_near_duplicate, to_hex, from_hex
 
 class VectorStore:
-    def __init__(self, persist_directory: str = "chroma_db"):
+    # Number of chunks embedded and written per call when streaming
+    DEFAULT_BATCH_SIZE = 256
+
+    def __init__(self, persist_directory: str = "chroma_db", deduplicate: bool = True):
         self.persist_directory = persist_directory
         self.client = chromadb.Client(Settings(
             persist_directory=persist_directory,
             is_persistent=True
         ))
 
+        # Near-duplicate detection. Each chunk stores its SimHash band keys as
+        # metadata, and candidates are looked up with a where filter one batch at
+        # a time, so nothing grows with the collection in process memory.
+        self.deduplicate = deduplicate
+
+        # Per-collection registry of stored sources and the next chunk sequence
+        # number, kept in a small JSON sidecar so listing documents and paging
+        # through a collection never needs a full metadata scan
+        self._registries: Dict[str, Dict] = {}
+
+        # Running embedding cost, used to estimate the time saved by skipped chunks
+        self._embedding_seconds = 0.0
+        self._chunks_embedded = 0
+
     def create_collection(self, collection_name: str):
         """Create a new collection or get existing one."""
         try:
@@ -19,29 +42,188 @@ class VectorStore:
             collection = self.client.create_collection(name=collection_name)
         return collection
 
-    def add_documents(self, collection_name: str, documents: List[str], metadata: Optional[List[Dict]] = None):
+    def add_documents(self, collection_name: str, documents: List[str], metadata: Optional[List[Dict]] = None,
+                      ids: Optional[List[str]] = None):
         """Add documents to the vector store."""
         collection = self.create_collection(collection_name)
         
         # Generate IDs for the documents
-        ids = [f"doc_{i}" for i in range(len(documents))]
+        if ids is None:
+            ids = [f"doc_{i}" for i in range(len(documents))]
         
         # If no metadata is provided, create empty metadata for each document
         if metadata is None:
             metadata = [{"source": "document"} for _ in documents]
         
+        # Fingerprint chunks so later near-duplicates can be collapsed onto them,
+        # and give each a sequence number so the collection can be paged by range
+        registry = self._registry(collection_name)
+        seq = registry["next_seq"]
+        metadata = [
+            {**_chunk_fields(document, meta), "seq": seq + i, **meta}
+            for i, (document, meta) in enumerate(zip(documents, metadata))
+        ]
+        # Reserve the sequence numbers before writing so a failed add never
+        # leaves chunks outside the range paged over
+        registry["next_seq"] = seq + len(documents)
+        self._register_sources(collection_name, [meta.get("source") for meta in metadata])
+
+        start = time.perf_counter()
         collection.add(
             documents=documents,
             ids=ids,
             metadatas=metadata
         )
+        self._embedding_seconds += time.perf_counter() - start
+        self._chunks_embedded += len(documents)
+
+    def add_document_stream(self, collection_name: str, documents: Iterable[str], metadata: Optional[Dict] = None,
+                            id_prefix: str = "doc", batch_size: int = DEFAULT_BATCH_SIZE,
+                            deduplicate: Optional[bool] = None) -> Dict[str, Any]:
+        """Add documents from an iterable in fixed-size batches, returning ingestion stats.
+
+        Only one batch is held in memory at a time, so the iterable may be a lazy
+        chunk stream of any length. Near-duplicates of chunks already in the
+        collection are not embedded; the existing chunk records the source instead.
+        See _new_stats() for the stats reported.
+        """
+        return self._add_stream(collection_name, documents, metadata, id_prefix, batch_size,
+                                deduplicate=deduplicate)
+
+    def _add_stream(self, collection_name: str, documents: Iterable[str], metadata: Optional[Dict],
+                    id_prefix: str, batch_size: int, replacing: bool = False,
+                    referenced: Optional[Set[str]] = None, newly_referenced: Optional[Set[str]] = None,
+                    deduplicate: Optional[bool] = None) -> Dict[str, Any]:
+        """Stream chunks into a collection, collapsing near-duplicates.
+
+        New chunks are tagged with id_prefix as their "version". When replacing,
+        the source's chunks whose text is unchanged are looked up by digest one
+        batch at a time and moved to the new version instead of being embedded
+        again, and its older chunks are never used as near-duplicate targets.
+        Chunks of other documents that were matched are added to referenced, and
+        those that newly gained the source as a reference to newly_referenced.
+        Candidates are the stored chunks sharing a SimHash band with the batch,
+        and one is only collapsed once is_near_duplicate() confirms it against
+        the stored text.
+        """
+        if metadata is None:
+            metadata = {"source": "document"}
+        source = metadata.get("source")
+        if deduplicate is None:
+            deduplicate = self.deduplicate
+
+        collection = self.create_collection(collection_name)
+        stats = self._new_stats()
+
+        documents = iter(documents)
+        count = 0
+        while True:
+            batch = list(islice(documents, batch_size))
+            if not batch:
+                break
+
+            unchanged = self._find_unchanged(collection, source, batch) if replacing else {}
+            kept: Dict[str, Dict] = {}
+            pending = []
+            for document in batch:
+                stats["chunks_seen"] += 1
+                digest = _digest(document)
+                if digest in unchanged:
+                    chunk_id, meta = unchanged[digest]
+                    kept[chunk_id] = meta
+                    stats["chunks_reused"] += 1
+                else:
+                    pending.append((document, digest, simhash(document)))
+
+            # Fingerprints of this batch's candidates only, plus its own new chunks
+            index = SimHashIndex()
+            if deduplicate and pending:
+                for chunk_id, meta in self._find_candidates(collection, [p[2] for p in pending]).items():
+                    # The version being replaced is about to be released
+                    if replacing and meta.get("source") == source and meta.get("version") != id_prefix:
+                        continue
+                    index.add(chunk_id, from_hex(meta["simhash"]))
+
+            new_documents, new_metadata, new_ids = [], [], []
+            duplicate_of: Dict[str, int] = {}
+            texts: Dict[str, str] = {}
+            for document, digest, fingerprint in pending:
+                match = None
+                if deduplicate:
+                    for candidate in index.candidates(fingerprint):
+                        if candidate not in texts:
+                            texts.update(self._get_texts(collection, [candidate]))
+                        if is_near_duplicate(document, texts.get(candidate, "")):
+                            match = candidate
+                            break
+                if match is not None:
+                    duplicate_of[match] = duplicate_of.get(match, 0) + 1
+                    stats["duplicates_skipped"] += 1
+                    stats["chars_saved"] += len(document)
+                    continue
+
+                chunk_id = f"{id_prefix}_{count}"
+                count += 1
+                new_documents.append(document)
+                new_metadata.append(dict(metadata, simhash=to_hex(fingerprint), digest=digest,
+                                         version=id_prefix, references=""))
+                new_ids.append(chunk_id)
+                # Index immediately so repeats within the same batch are caught
+                if deduplicate:
+                    index.add(chunk_id, fingerprint)
+                    texts[chunk_id] = document
+
+            # Carry unchanged chunks over to the new version
+            moved = [chunk_id for chunk_id, meta in kept.items() if meta.get("version") != id_prefix]
+            if moved:
+                collection.update(ids=moved, metadatas=[dict(kept[i], version=id_prefix) for i in moved])
+
+            if new_documents:
+                start = time.perf_counter()
+                self.add_documents(
+                    collection_name=collection_name,
+                    documents=new_documents,
+                    metadata=new_metadata,
+                    ids=new_ids
+                )
+                stats["chunks_stored"] += len(new_documents)
+                stats["embedding_seconds"] += time.perf_counter() - start
+
+            if duplicate_of:
+                added = self._add_reference(collection_name, list(duplicate_of), source)
+                if referenced is not None:
+                    referenced.update(duplicate_of)
+                if newly_referenced is not None:
+                    newly_referenced.update(added)
+
+        # Estimate the embedding time skipped chunks would have cost, from this
+        # call's measured cost or, if nothing was embedded, the running average
+        if stats["chunks_stored"]:
+            per_chunk = stats["embedding_seconds"] / stats["chunks_stored"]
+        else:
+            per_chunk = self._embedding_seconds / self._chunks_embedded if self._chunks_embedded else 0.0
+        stats["embedding_seconds_saved"] = (stats["duplicates_skipped"] + stats["chunks_reused"]) * per_chunk
+
+        if stats["chunks_seen"] and source is not None:
+            self._register_sources(collection_name, [source])
+        return stats
+
+    def count(self, collection_name: str) -> int:
+        """Count the chunks in a collection, treating a missing collection as empty."""
+        try:
+            collection = self.client.get_collection(name=collection_name)
+        except Exception:
+            return 0
+        return collection.count()
 
-    def query(self, collection_name: str, query_text: str, n_results: int = 5) -> List[Dict]:
+    def query(self, collection_name: str, query_text: str, n_results: int = 5,
+              where: Optional[Dict] = None) -> List[Dict]:
         """Query the vector store for similar documents."""
         collection = self.client.get_collection(name=collection_name)
         results = collection.query(
             query_texts=[query_text],
-            n_results=n_results
+            n_results=n_results,
+            where=where
         )
         
         return {
@@ -50,6 +232,395 @@ class VectorStore:
             "distances": results["distances"][0]
         }
 
+    def neighbour_distances(self, collection_name: str, sample_size: int = 50, k: int = 5) -> List[float]:
+        """Distances from a sample of chunks to their k-th nearest other chunk.
+
+        The sample is spread evenly over the collection by sequence number.
+        Returns an empty list when the collection has no more than k chunks.
+        """
+        if self.count(collection_name) <= k:
+            return []
+        collection = self.client.get_collection(name=collection_name)
+        next_seq = self._registry(collection_name)["next_seq"]
+        step = max(1, next_seq // sample_size)
+        sample = collection.get(
+            where={"seq": {"$in": list(range(0, next_seq, step))[:sample_size]}},
+            include=["documents"]
+        )
+        if not sample["ids"]:
+            return []
+
+        results = collection.query(query_texts=sample["documents"], n_results=k + 1, include=["distances"])
+        distances = []
+        for chunk_id, ids, row in zip(sample["ids"], results["ids"], results["distances"]):
+            others = [distance for other, distance in zip(ids, row) if other != chunk_id]
+            if len(others) >= k:
+                distances.append(others[k - 1])
+        return distances
+
+    def get_document_ids(self, collection_name: str, source: str) -> List[str]:
+        """Get the IDs of all chunks stored for a source document."""
+        collection = self.client.get_collection(name=collection_name)
+        return collection.get(where={"source": source}, include=[])["ids"]
+
+    def list_documents(self, collection_name: str) -> List[str]:
+        """List the source documents stored in a collection, from its source registry."""
+        return list(self._registry(collection_name)["sources"])
+
+    def has_document(self, collection_name: str, source: str) -> bool:
+        """Check whether a source document is stored in a collection."""
+        return source in self._registry(collection_name)["sources"]
+
+    def delete_document(self, collection_name: str, source: str) -> int:
+        """Delete every chunk of a single source document, returning how many were removed.
+
+        Chunks that other documents also reference are handed over to one of
+        them rather than deleted.
+        """
+        removed = self._drain(collection_name, {"source": source}, self._release_chunks)
+        self._prune_references(collection_name, source, keep=set())
+        self._unregister_source(collection_name, source)
+        return removed
+
+    def replace_document(self, collection_name: str, source: str, documents: Iterable[str],
+                         metadata: Optional[Dict] = None, id_prefix: str = "doc",
+                         batch_size: int = DEFAULT_BATCH_SIZE,
+                         deduplicate: Optional[bool] = None) -> Dict[str, Any]:
+        """Replace a source document's chunks without touching the rest of the collection.
+
+        The new chunks are written first, tagged with id_prefix as their version,
+        and the old ones removed only once that succeeds; on failure the partially
+        written chunks are rolled back and the previous version is left in place.
+        Chunks whose text is unchanged are kept as they are instead of being
+        embedded again. Memory use does not depend on the size of the old
+        version. Returns the ingestion stats of add_document_stream().
+        """
+        if metadata is None:
+            metadata = {"source": source}
+
+        self.create_collection(collection_name)
+        referenced, newly_referenced = set(), set()
+        try:
+            stats = self._add_stream(
+                collection_name,
+                documents,
+                metadata,
+                id_prefix,
+                batch_size,
+                replacing=True,
+                referenced=referenced,
+                newly_referenced=newly_referenced,
+                deduplicate=deduplicate
+            )
+        except Exception:
+            def rollback(collection_name: str, ids: List[str], metadatas: List[Dict]):
+                self._delete_ids(collection_name, [i for i in ids if i.startswith(f"{id_prefix}_")])
+                kept = [(i, m) for i, m in zip(ids, metadatas) if not i.startswith(f"{id_prefix}_")]
+                if kept:
+                    self.client.get_collection(name=collection_name).update(
+                        ids=[i for i, _ in kept],
+                        metadatas=[dict(m, version="") for _, m in kept]
+                    )
+
+            self._drain(collection_name, {"$and": [{"source": source}, {"version": id_prefix}]}, rollback)
+            self._remove_reference(collection_name, list(newly_referenced), source)
+            raise
+
+        # Whatever the new version did not carry over belongs to the old one
+        self._drain(
+            collection_name,
+            {"$and": [{"source": source}, {"version": {"$ne": id_prefix}}]},
+            self._release_chunks
+        )
+        self._prune_references(collection_name, source, keep=referenced)
+        if not stats["chunks_seen"]:
+            self._unregister_source(collection_name, source)
+        return stats
+
+    def compact_collection(self, collection_name: str) -> int:
+        """Rebuild a collection to reclaim space left behind by deleted chunks.
+
+        Stored embeddings are copied into a fresh collection, so nothing is
+        re-embedded, and sequence numbers are renumbered densely. The copy is
+        swapped in by renaming, and the original is only dropped once the copy
+        holds its name. Returns the number of chunks kept.
+        """
+        collection = self.client.get_collection(name=collection_name)
+        suffix = uuid.uuid4().hex[:8]
+        compacted = self.client.create_collection(
+            name=f"{collection_name}_compact_{suffix}",
+            metadata=collection.metadata
+        )
+
+        try:
+            count = 0
+            for batch in self._iter_pages(collection_name, include=["documents", "metadatas", "embeddings"]):
+                compacted.add(
+                    ids=batch["ids"],
+                    documents=batch["documents"],
+                    metadatas=[dict(meta, seq=count + i) for i, meta in enumerate(batch["metadatas"])],
+                    embeddings=batch["embeddings"]
+                )
+                count += len(batch["ids"])
+
+            # Move the original aside before the copy takes its name, restoring
+            # it if the swap fails
+            collection.modify(name=f"{collection_name}_old_{suffix}")
+            try:
+                compacted.modify(name=collection_name)
+            except Exception:
+                collection.modify(name=collection_name)
+                raise
+        except Exception:
+            self.client.delete_collection(name=compacted.name)
+            raise
+
+        registry = self._registry(collection_name)
+        registry["next_seq"] = count
+        self._save_registry(collection_name, registry)
+        self.client.delete_collection(name=collection.name)
+        return count
+
+    def _new_stats(self) -> Dict[str, Any]:
+        """Counters reported for a single ingestion call."""
+        return {
+            "chunks_seen": 0,
+            "chunks_stored": 0,
+            "duplicates_skipped": 0,
+            "chunks_reused": 0,
+            "chars_saved": 0,
+            "embedding_seconds": 0.0,
+            "embedding_seconds_saved": 0.0,
+        }
+
+    def _get_texts(self, collection, ids: List[str]) -> Dict[str, str]:
+        """Fetch the stored text of chunks by ID."""
+        found = collection.get(ids=ids, include=["documents"])
+        return dict(zip(found["ids"], found["documents"]))
+
+    def _find_candidates(self, collection, fingerprints: List[int]) -> Dict[str, Dict]:
+        """Fetch the metadata of stored chunks sharing a SimHash band with any of the fingerprints."""
+        keys = [band_keys(fingerprint) for fingerprint in fingerprints]
+        found = collection.get(
+            where={"$or": [
+                {_band_field(band): {"$in": sorted({k[band] for k in keys})}}
+                for band in range(BANDS)
+            ]},
+            include=["metadatas"]
+        )
+        return {
+            chunk_id: meta
+            for chunk_id, meta in zip(found["ids"], found["metadatas"])
+            if meta and meta.get("simhash")
+        }
+
+    def _find_unchanged(self, collection, source: Optional[str], batch: List[str]) -> Dict[str, tuple]:
+        """Map the digests of a batch to existing chunks of source with the same text."""
+        found = collection.get(
+            where={"$and": [{"source": source}, {"digest": {"$in": sorted({_digest(d) for d in batch})}}]},
+            include=["metadatas"]
+        )
+        unchanged = {}
+        for chunk_id, meta in zip(found["ids"], found["metadatas"]):
+            unchanged.setdefault(meta["digest"], (chunk_id, meta))
+        return unchanged
+
+    def _iter_pages(self, collection_name: str, where: Optional[Dict] = None,
+                    include: Optional[List[str]] = None) -> Iterator[Dict]:
+        """Page through a collection by sequence-number range instead of OFFSET."""
+        collection = self.client.get_collection(name=collection_name)
+        next_seq = self._registry(collection_name)["next_seq"]
+        for start in range(0, next_seq, self.DEFAULT_BATCH_SIZE):
+            clauses = [{"seq": {"$gte": start}}, {"seq": {"$lt": start + self.DEFAULT_BATCH_SIZE}}]
+            if where:
+                clauses.append(where)
+            batch = collection.get(where={"$and": clauses}, include=include or ["metadatas"])
+            if batch["ids"]:
+                yield batch
+
+    def _drain(self, collection_name: str, where: Dict, handle: Callable[[str, List[str], List[Dict]], None]) -> int:
+        """Repeatedly fetch a batch of chunks matching where and hand it to handle.
+
+        handle must leave every chunk it is given no longer matching (deleted or
+        updated), so no OFFSET is needed. Returns the number of chunks handled.
+        """
+        collection = self.client.get_collection(name=collection_name)
+        handled = 0
+        while True:
+            batch = collection.get(where=where, include=["metadatas"], limit=self.DEFAULT_BATCH_SIZE)
+            if not batch["ids"]:
+                return handled
+            handle(collection_name, batch["ids"], batch["metadatas"])
+            handled += len(batch["ids"])
+
+    def _prune_references(self, collection_name: str, source: str, keep: Set[str]):
+        """Drop source from the references of shared chunks other than those in keep."""
+        for batch in self._iter_pages(collection_name, where={"references": {"$ne": ""}}):
+            stale = [
+                chunk_id for chunk_id, meta in zip(batch["ids"], batch["metadatas"])
+                if source in _references(meta) and chunk_id not in keep
+            ]
+            self._remove_reference(collection_name, stale, source)
+
+    def _add_reference(self, collection_name: str, ids: List[str], source: Optional[str]) -> List[str]:
+        """Record source on existing chunks it duplicated, returning the chunks that gained it."""
+        if source is None:
+            return []
+        collection = self.client.get_collection(name=collection_name)
+        current = collection.get(ids=ids, include=["metadatas"])
+        update_ids, update_metadata = [], []
+        for chunk_id, meta in zip(current["ids"], current["metadatas"]):
+            references = _references(meta)
+            if source == meta.get("source") or source in references:
+                continue
+            update_ids.append(chunk_id)
+            update_metadata.append(dict(meta, references="\n".join(references + [source])))
+        if update_ids:
+            collection.update(ids=update_ids, metadatas=update_metadata)
+        return update_ids
+
+    def _remove_reference(self, collection_name: str, ids: List[str], source: str):
+        """Drop source from the references of the given chunks."""
+        if not ids:
+            return
+        collection = self.client.get_collection(name=collection_name)
+        for start in range(0, len(ids), self.DEFAULT_BATCH_SIZE):
+            current = collection.get(ids=ids[start:start + self.DEFAULT_BATCH_SIZE], include=["metadatas"])
+            metadata = [
+                dict(meta, references="\n".join(r for r in _references(meta) if r != source))
+                for meta in current["metadatas"]
+            ]
+            collection.update(ids=current["ids"], metadatas=metadata)
+
+    def _release_chunks(self, collection_name: str, ids: List[str], metadatas: List[Dict]):
+        """Remove a document's own chunks, handing shared ones over to a referencing document."""
+        delete_ids, update_ids, update_metadata = [], [], []
+        for chunk_id, meta in zip(ids, metadatas):
+            references = _references(meta)
+            if references:
+                update_ids.append(chunk_id)
+                update_metadata.append(dict(meta, source=references[0], references="\n".join(references[1:])))
+            else:
+                delete_ids.append(chunk_id)
+        if update_ids:
+            self.client.get_collection(name=collection_name).update(ids=update_ids, metadatas=update_metadata)
+        self._delete_ids(collection_name, delete_ids)
+
+    def _delete_ids(self, collection_name: str, ids: List[str]):
+        """Delete chunks by ID in batches."""
+        collection = self.client.get_collection(name=collection_name)
+        for start in range(0, len(ids), self.DEFAULT_BATCH_SIZE):
+            collection.delete(ids=ids[start:start + self.DEFAULT_BATCH_SIZE])
+
+    def _registry_path(self, collection_name: str) -> str:
+        return os.path.join(self.persist_directory, "source_registry", f"{collection_name}.json")
+
+    def _registry(self, collection_name: str) -> Dict:
+        """Get a collection's source registry, building it on first use."""
+        registry = self._registries.get(collection_name)
+        if registry is None:
+            try:
+                with open(self._registry_path(collection_name), "r", encoding="utf-8") as file:
+                    registry = json.load(file)
+            except (OSError, ValueError):
+                registry = self._build_registry(collection_name)
+            self._registries[collection_name] = registry
+        return registry
+
+    def _build_registry(self, collection_name: str) -> Dict:
+        """Build the registry of a collection that has none yet.
+
+        This is a one-off scan that also fills in the bookkeeping metadata
+        (sequence number, digest, fingerprint) of chunks written before it existed.
+        """
+        registry = {"next_seq": 0, "sources": []}
+        try:
+            collection = self.client.get_collection(name=collection_name)
+        except Exception:
+            return registry
+
+        sources = set()
+        offset = 0
+        while True:
+            batch = collection.get(include=["documents", "metadatas"], limit=self.DEFAULT_BATCH_SIZE, offset=offset)
+            if not batch["ids"]:
+                break
+            update_ids, update_metadata = [], []
+            for chunk_id, document, meta in zip(batch["ids"], batch["documents"], batch["metadatas"]):
+                meta = meta or {}
+                if "seq" in meta:
+                    registry["next_seq"] = max(registry["next_seq"], meta["seq"] + 1)
+                else:
+                    meta = {**_chunk_fields(document, meta), "seq": registry["next_seq"], **meta}
+                    registry["next_seq"] += 1
+                    update_ids.append(chunk_id)
+                    update_metadata.append(meta)
+                sources.add(meta.get("source"))
+                sources.update(_references(meta))
+            if update_ids:
+                collection.update(ids=update_ids, metadatas=update_metadata)
+            offset += len(batch["ids"])
+
+        registry["sources"] = sorted(s for s in sources if s is not None)
+        self._save_registry(collection_name, registry)
+        return registry
+
+    def _save_registry(self, collection_name: str, registry: Dict):
+        path = self._registry_path(collection_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "w", encoding="utf-8") as file:
+            json.dump(registry, file)
+        os.replace(path + ".tmp", path)
+
+    def _register_sources(self, collection_name: str, sources: Iterable[Optional[str]]):
+        """Add sources to a collection's registry and persist it."""
+        registry = self._registry(collection_name)
+        registry["sources"] = sorted(set(registry["sources"]).union(s for s in sources if s is not None))
+        self._save_registry(collection_name, registry)
+
+    def _unregister_source(self, collection_name: str, source: str):
+        registry = self._registry(collection_name)
+        if source in registry["sources"]:
+            registry["sources"].remove(source)
+            self._save_registry(collection_name, registry)
+
     def delete_collection(self, collection_name: str):
         """Delete a collection from the vector store."""
-        self.client.delete_collection(name=collection_name) 
\ No newline at end of file
+        self.client.delete_collection(name=collection_name)
+        self._registries.pop(collection_name, None)
+        try:
+            os.remove(self._registry_path(collection_name))
+        except OSError:
+            pass
+
+
+def _digest(text: str) -> str:
+    """Exact-content key used to recognise unchanged chunks on replace."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _band_field(band: int) -> str:
+    """Metadata key holding one SimHash band of a chunk's fingerprint."""
+    return f"simhash_band_{band}"
+
+
+def _chunk_fields(document: str, metadata: Dict) -> Dict:
+    """Bookkeeping metadata every chunk carries, computing only what metadata lacks."""
+    fields = {"references": "", "version": ""}
+    if "simhash" in metadata:
+        fingerprint = from_hex(metadata["simhash"])
+    else:
+        fingerprint = simhash(document)
+        fields["simhash"] = to_hex(fingerprint)
+    for band, key in enumerate(band_keys(fingerprint)):
+        fields[_band_field(band)] = key
+    if "digest" not in metadata:
+        fields["digest"] = _digest(document)
+    return fields
+
+
+def _references(metadata: Optional[Dict]) -> List[str]:
+    """Other sources recorded on a chunk that was collapsed from near-duplicates."""
+    if not metadata or not metadata.get("references"):
+        return []
+    return metadata["references"].split("\n")
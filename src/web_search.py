@@ -0,0 +1,214 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+from html.parser import HTMLParser
+from typing import List, Dict, Optional
+from urllib.parse import urlencode, urlparse, parse_qs
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+class _TextExtractor(HTMLParser):
+    """Collect the visible text of an HTML page."""
+
+    SKIP_TAGS = {"script", "style", "noscript", "head", "svg", "nav", "footer"}
+    BLOCK_TAGS = {"p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "section", "article"}
+
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+        self.skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS and self.skip_depth:
+            self.skip_depth -= 1
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.parts.append(data)
+
+
+def extract_text(html: str) -> str:
+    """Extract readable text from an HTML page."""
+    parser = _TextExtractor()
+    parser.feed(html)
+    parser.close()
+    lines = (" ".join(line.split()) for line in "".join(parser.parts).splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+class HTTPCache:
+    """On-disk cache of fetched pages keyed by URL, storing validators for revalidation."""
+
+    def __init__(self, cache_directory: str = "web_cache"):
+        self.cache_directory = cache_directory
+        os.makedirs(cache_directory, exist_ok=True)
+
+    def _path(self, url: str) -> str:
+        return os.path.join(self.cache_directory, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Get a cached entry, or None if the URL has not been fetched before."""
+        try:
+            with open(self._path(url), "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, url: str, text: str, etag: Optional[str], last_modified: Optional[str]):
+        """Store a page's extracted text along with its validators."""
+        entry = {"url": url, "text": text, "etag": etag, "last_modified": last_modified}
+        path = self._path(url)
+        with open(path + ".tmp", "w", encoding="utf-8") as file:
+            json.dump(entry, file)
+        os.replace(path + ".tmp", path)
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """Build If-None-Match / If-Modified-Since headers for a cached URL."""
+        entry = self.get(url)
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+
+class SearchBackend(ABC):
+    """Turns a query into a list of result page URLs."""
+
+    @abstractmethod
+    async def search(self, session: aiohttp.ClientSession, query: str, max_results: int) -> List[str]:
+        """Return up to max_results URLs for the query."""
+        pass
+
+
+class _ResultLinkParser(HTMLParser):
+    """Collect result links from a DuckDuckGo HTML results page."""
+
+    def __init__(self):
+        super().__init__()
+        self.links = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "a" and "result__a" in (attrs.get("class") or "").split() and attrs.get("href"):
+            self.links.append(attrs["href"])
+
+
+class DuckDuckGoSearchBackend(SearchBackend):
+    """Search backend using DuckDuckGo's HTML endpoint, which needs no API key."""
+
+    def __init__(self, endpoint: str = "https://html.duckduckgo.com/html/"):
+        self.endpoint = endpoint
+
+    async def search(self, session: aiohttp.ClientSession, query: str, max_results: int) -> List[str]:
+        async with session.get(f"{self.endpoint}?{urlencode({'q': query})}") as response:
+            response.raise_for_status()
+            html = await response.text()
+
+        parser = _ResultLinkParser()
+        parser.feed(html)
+
+        urls = []
+        for href in parser.links:
+            # Results are wrapped in a redirect link carrying the target in "uddg"
+            target = parse_qs(urlparse(href).query).get("uddg", [href])[0]
+            if target.startswith("//"):
+                target = "https:" + target
+            if target.startswith("http") and target not in urls:
+                urls.append(target)
+            if len(urls) >= max_results:
+                break
+        return urls
+
+
+class WebFetcher:
+    """Runs a search and fetches the result pages concurrently over a pooled HTTP client."""
+
+    # Bytes read from a response body per step
+    READ_CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, backend: Optional[SearchBackend] = None, cache: Optional[HTTPCache] = None,
+                 max_connections: int = 8, timeout: float = 10.0, max_page_bytes: int = 2 * 1024 * 1024):
+        self.backend = backend or DuckDuckGoSearchBackend()
+        self.cache = cache or HTTPCache()
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.max_page_bytes = max_page_bytes
+
+    def search_and_fetch(self, query: str, max_results: int = 5) -> List[Dict]:
+        """Search for a query and return the fetched result pages.
+
+        Each page is a dict with "url", "text" and "from_cache" (True when the
+        server answered 304 Not Modified). Pages that fail to load are skipped.
+        """
+        return asyncio.run(self._search_and_fetch(query, max_results))
+
+    def fetch(self, urls: List[str]) -> List[Dict]:
+        """Fetch the given URLs concurrently, see search_and_fetch()."""
+        return asyncio.run(self._with_session(lambda session: self._fetch_all(session, urls)))
+
+    async def _with_session(self, run):
+        connector = aiohttp.TCPConnector(limit=self.max_connections)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        headers = {"User-Agent": "Mozilla/5.0 (compatible; AIResearchAssistant/1.0)"}
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=headers) as session:
+            return await run(session)
+
+    async def _search_and_fetch(self, query: str, max_results: int) -> List[Dict]:
+        async def run(session):
+            urls = await self.backend.search(session, query, max_results)
+            return await self._fetch_all(session, urls)
+        return await self._with_session(run)
+
+    async def _fetch_all(self, session: aiohttp.ClientSession, urls: List[str]) -> List[Dict]:
+        pages = await asyncio.gather(*(self._fetch(session, url) for url in urls), return_exceptions=True)
+        for url, page in zip(urls, pages):
+            if isinstance(page, Exception):
+                logger.warning("Failed to fetch %s: %r", url, page)
+        return [page for page in pages if isinstance(page, dict) and page["text"]]
+
+    async def _fetch(self, session: aiohttp.ClientSession, url: str) -> Dict:
+        async with session.get(url, headers=self.cache.conditional_headers(url)) as response:
+            if response.status == 304:
+                # The cache entry can disappear after the conditional headers were
+                # built; with no body to fall back on the page is dropped
+                entry = self.cache.get(url)
+                if entry is None:
+                    return {"url": url, "text": "", "from_cache": True}
+                return {"url": url, "text": entry["text"], "from_cache": True}
+            response.raise_for_status()
+
+            content_type = response.headers.get("Content-Type", "")
+            if content_type and "html" not in content_type and "text/plain" not in content_type:
+                return {"url": url, "text": "", "from_cache": False}
+
+            # read(n) only returns what is already buffered, so read until EOF or
+            # the size limit; a truncated page would otherwise be cached as complete
+            body = bytearray()
+            async for block in response.content.iter_chunked(self.READ_CHUNK_SIZE):
+                body.extend(block)
+                if len(body) >= self.max_page_bytes:
+                    del body[self.max_page_bytes:]
+                    break
+            text = bytes(body).decode(response.charset or "utf-8", errors="replace")
+            if "text/plain" not in content_type:
+                text = extract_text(text)
+
+            self.cache.put(url, text, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+            return {"url": url, "text": text, "from_cache": False}
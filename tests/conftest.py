@@ -0,0 +1,92 @@
+import pytest
+
+
+class FakeCollection:
+    """In-memory stand-in for the parts of a Chroma collection VectorStore uses.
+
+    where filters follow Chroma's semantics, including $ne only matching
+    chunks that have the key.
+    """
+
+    def __init__(self, name, metadata=None, client=None):
+        self.name = name
+        self.metadata = metadata
+        self.client = client
+        self.rows = {}
+        self.calls = []
+
+    def _matches(self, meta, where):
+        if not where:
+            return True
+        (key, value), = where.items()
+        if key == "$and":
+            return all(self._matches(meta, clause) for clause in value)
+        if key == "$or":
+            return any(self._matches(meta, clause) for clause in value)
+        if not isinstance(value, dict):
+            return meta.get(key) == value
+        (op, operand), = value.items()
+        if key not in meta:
+            return False
+        return {
+            "$eq": lambda v: v == operand,
+            "$ne": lambda v: v != operand,
+            "$in": lambda v: v in operand,
+            "$gte": lambda v: v >= operand,
+            "$lt": lambda v: v < operand,
+        }[op](meta[key])
+
+    def add(self, ids, documents, metadatas, embeddings=None):
+        for chunk_id, document, meta in zip(ids, documents, metadatas):
+            self.rows[chunk_id] = (document, dict(meta))
+
+    def get(self, ids=None, where=None, include=(), limit=None, offset=0):
+        self.calls.append({"ids": ids, "where": where, "limit": limit, "offset": offset})
+        keys = [k for k in self.rows if (ids is None or k in ids) and self._matches(self.rows[k][1], where)]
+        keys = keys[offset:offset + limit] if limit else keys
+        return {
+            "ids": keys,
+            "documents": [self.rows[k][0] for k in keys],
+            "metadatas": [dict(self.rows[k][1]) for k in keys],
+            "embeddings": [[0.0] for _ in keys],
+        }
+
+    def update(self, ids, metadatas):
+        for chunk_id, meta in zip(ids, metadatas):
+            self.rows[chunk_id] = (self.rows[chunk_id][0], dict(meta))
+
+    def delete(self, ids):
+        for chunk_id in ids:
+            self.rows.pop(chunk_id, None)
+
+    def count(self):
+        return len(self.rows)
+
+    def modify(self, name):
+        self.client.collections[name] = self.client.collections.pop(self.name)
+        self.name = name
+
+
+class FakeClient:
+    def __init__(self):
+        self.collections = {}
+
+    def get_collection(self, name):
+        return self.collections[name]
+
+    def create_collection(self, name, metadata=None):
+        self.collections[name] = FakeCollection(name, metadata, self)
+        return self.collections[name]
+
+    def delete_collection(self, name):
+        del self.collections[name]
+
+
+@pytest.fixture
+def store(tmp_path):
+    pytest.importorskip("chromadb")
+    from src.vector_store import VectorStore
+
+    store = VectorStore(persist_directory=str(tmp_path))
+    store.client = FakeClient()
+    return store
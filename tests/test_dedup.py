@@ -0,0 +1,84 @@
+from src.dedup import MAX_DISTANCE, is_near_duplicate, simhash
+
+FILING = (
+    "For the third quarter of fiscal 2024, the Company reported total revenue of $4.21 billion, "
+    "an increase of 12% compared with $3.76 billion in the prior-year period. Diluted earnings per "
+    "share were $1.87, compared with $1.52 a year ago, while adjusted diluted EPS was $2.04. "
+    "Operating margin expanded to 23.4% from 21.9%, reflecting improved pricing and lower input "
+    "costs across the industrial segment. The Company repurchased 3.2 million shares for $412 "
+    "million during the quarter and ended the period with 215.6 million diluted shares outstanding. "
+    "Cash flow from operations was $918 million, and free cash flow reached $701 million."
+)
+
+DISCLAIMER = (
+    "This report contains forward-looking statements within the meaning of the Private Securities "
+    "Litigation Reform Act. Such statements are subject to risks and uncertainties that could cause "
+    "actual results to differ materially from those expressed or implied, including changes in "
+    "economic conditions, competition, regulation and the other factors described in our filings."
+)
+
+
+def _distance(a: str, b: str) -> int:
+    return bin(simhash(a) ^ simhash(b)).count("1")
+
+
+def test_changed_figure_is_not_a_near_duplicate():
+    for old, new in [("$1.87", "$1.89"), ("$4.21", "$4.25"), ("215.6", "216.1"), ("$918", "$921")]:
+        variant = FILING.replace(old, new)
+        assert not is_near_duplicate(FILING, variant)
+
+
+def test_simhash_alone_would_collapse_changed_figures():
+    # The confirmation step matters: these variants are SimHash candidates
+    for old, new in [("$4.21", "$4.25"), ("$918", "$921")]:
+        assert _distance(FILING, FILING.replace(old, new)) <= MAX_DISTANCE
+
+
+def test_repeated_boilerplate_is_a_near_duplicate():
+    # Layout and case differences from extraction do not prevent collapsing
+    reflowed = DISCLAIMER.replace(". ", ".\n\n").upper()
+    assert is_near_duplicate(DISCLAIMER, DISCLAIMER)
+    assert is_near_duplicate(DISCLAIMER, reflowed)
+    assert _distance(DISCLAIMER, reflowed) == 0
+
+
+def test_chunks_differing_only_in_a_figure_are_both_stored(store):
+    store.add_document_stream("filings", [FILING, DISCLAIMER], metadata={"source": "q3.pdf"}, id_prefix="a")
+    stats = store.add_document_stream(
+        "filings",
+        [FILING.replace("$4.21", "$4.25"), DISCLAIMER],
+        metadata={"source": "q3-restated.pdf"},
+        id_prefix="b"
+    )
+
+    documents = [row[0] for row in store.client.collections["filings"].rows.values()]
+    assert FILING in documents
+    assert FILING.replace("$4.21", "$4.25") in documents
+    assert documents.count(DISCLAIMER) == 1
+    assert stats["chunks_stored"] == 1
+    assert stats["duplicates_skipped"] == 1
+    assert sorted(store.list_documents("filings")) == ["q3-restated.pdf", "q3.pdf"]
+
+
+def test_duplicates_are_found_through_stored_band_keys(store):
+    from src.vector_store import VectorStore
+
+    store.add_document_stream("filings", [FILING, DISCLAIMER], metadata={"source": "q3.pdf"}, id_prefix="a")
+    collection = store.client.collections["filings"]
+    assert all("simhash_band_3" in meta for _, meta in collection.rows.values())
+
+    # A fresh store has nothing in memory; candidates come from chunk metadata
+    fresh = VectorStore(persist_directory=store.persist_directory)
+    fresh.client = store.client
+    collection.calls.clear()
+    stats = fresh.add_document_stream(
+        "filings",
+        [DISCLAIMER.upper(), FILING.replace("$918", "$921")],
+        metadata={"source": "q4.pdf"},
+        id_prefix="b"
+    )
+
+    assert stats["duplicates_skipped"] == 1
+    assert stats["chunks_stored"] == 1
+    # No call reads the whole collection
+    assert all(call["ids"] is not None or call["where"] for call in collection.calls)
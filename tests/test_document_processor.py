@@ -0,0 +1,57 @@
+import pytest
+
+pytest.importorskip("langchain")
+pytest.importorskip("PyPDF2")
+
+from src.document_processor import DocumentProcessor
+
+CHUNK_SIZE = 1000
+BLOCK_SIZE = 1500
+
+TEXT = "\n\n".join(
+    " ".join(f"paragraph {p} sentence {s} reports revenue of {p * 31 + s} million." for s in range(12))
+    for p in range(60)
+)
+
+
+@pytest.fixture
+def processor():
+    processor = DocumentProcessor()
+    processor.READ_BLOCK_SIZE = BLOCK_SIZE
+    return processor
+
+
+def _blocks(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def test_streamed_chunks_overlap_and_cover_text(processor):
+    chunks = list(processor.iter_chunks(_blocks(TEXT, BLOCK_SIZE)))
+
+    assert len(chunks) > 10
+    position, end = 0, 0
+    for chunk in chunks:
+        start = TEXT.find(chunk, position)
+        assert start >= 0
+        # Each chunk overlaps the previous one or follows it across a separator
+        assert start <= end + 2
+        position, end = start + 1, start + len(chunk)
+    assert TEXT.find(chunks[0]) == 0
+    assert end == len(TEXT)
+    assert chunks == processor.chunk_text(TEXT)
+
+
+def test_streaming_buffer_stays_bounded(processor):
+    split = processor.chunk_text
+    peak = 0
+
+    def chunk_text(text):
+        nonlocal peak
+        peak = max(peak, len(text))
+        return split(text)
+
+    processor.chunk_text = chunk_text
+    list(processor.iter_chunks(_blocks(TEXT, BLOCK_SIZE)))
+
+    assert len(TEXT) > 20 * BLOCK_SIZE
+    assert peak <= BLOCK_SIZE + CHUNK_SIZE
@@ -0,0 +1,161 @@
+import pytest
+
+pytest.importorskip("google.generativeai")
+pytest.importorskip("langchain")
+pytest.importorskip("chromadb")
+
+import src.rag_pipeline as rag_pipeline
+from src.agent import Agent
+from src.rag_pipeline import RAGPipeline
+
+
+class StubVectorStore:
+    """Returns fixed, already-sorted distances for every query."""
+
+    def __init__(self, distances=(), neighbour_distances=()):
+        self.distances = list(distances)
+        self.neighbours = list(neighbour_distances)
+
+    def count(self, collection_name):
+        return len(self.distances)
+
+    def query(self, collection_name, query_text, n_results=5, where=None):
+        distances = self.distances[:n_results]
+        return {
+            "documents": [f"chunk {i}" for i in range(len(distances))],
+            "metadatas": [{"source": "report.pdf"} for _ in distances],
+            "distances": distances,
+        }
+
+    def neighbour_distances(self, collection_name, sample_size=50, k=5):
+        return self.neighbours
+
+
+class StubModel:
+    def __init__(self):
+        self.calls = 0
+
+    def generate_content(self, prompt):
+        self.calls += 1
+        return type("Response", (), {"text": "answer"})()
+
+
+@pytest.fixture
+def make_pipeline(monkeypatch):
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+
+    def make(distances=(), neighbour_distances=(), **kwargs):
+        store = StubVectorStore(distances, neighbour_distances)
+        monkeypatch.setattr(rag_pipeline, "VectorStore", lambda: store)
+        pipeline = RAGPipeline(**kwargs)
+        pipeline.model = StubModel()
+        return pipeline
+
+    return make
+
+
+def test_chunks_past_the_threshold_are_cut(make_pipeline):
+    pipeline = make_pipeline([0.5, 0.7, 1.3, 1.4])
+
+    results = pipeline.retrieve("revenue growth", "default")
+
+    assert results["relevant"]
+    assert results["distances"] == [0.5, 0.7]
+
+
+def test_results_extend_past_min_results_only_within_spread(make_pipeline):
+    pipeline = make_pipeline([0.50, 0.55, 0.58, 0.62, 0.64, 0.70], min_results=2, max_results=6, score_spread=0.1)
+
+    results = pipeline.retrieve("revenue growth", "default")
+
+    # 0.62 is inside the threshold but more than score_spread behind the best match
+    assert results["distances"] == [0.50, 0.55, 0.58]
+
+
+def test_results_stop_at_max_results(make_pipeline):
+    pipeline = make_pipeline([0.5] * 20, min_results=2, max_results=6)
+
+    assert len(pipeline.retrieve("revenue growth", "default")["documents"]) == 6
+
+
+def test_empty_collection_skips_the_model(make_pipeline):
+    pipeline = make_pipeline([])
+
+    results = pipeline.retrieve("revenue growth", "default")
+    assert results["documents"] == []
+    assert not results["relevant"]
+
+    assert pipeline.generate_response("revenue growth", "default", results=results) == RAGPipeline.NO_CONTEXT_MESSAGE
+    assert pipeline.model.calls == 0
+    assert pipeline.get_metrics()["model_calls_saved"] == 1
+
+
+def test_metrics_count_saved_calls_and_hit_rate(make_pipeline):
+    pipeline = make_pipeline([0.5, 0.6])
+    assert pipeline.generate_response("revenue growth", "default") == "answer"
+
+    pipeline.vector_store.distances = [1.6, 1.7]
+    assert pipeline.generate_response("weather in Paris", "default") == RAGPipeline.NO_CONTEXT_MESSAGE
+
+    metrics = pipeline.get_metrics()
+    assert pipeline.model.calls == 1
+    assert metrics["queries"] == 2
+    assert metrics["model_calls_saved"] == 1
+    assert metrics["hit_rate"] == 0.5
+    assert metrics["avg_chunks_sent"] == 2
+
+
+def test_threshold_is_calibrated_from_neighbour_distances(make_pipeline):
+    neighbours = [0.15 + 0.1 * i for i in range(10)]
+    pipeline = make_pipeline([0.9, 1.0, 1.1, 1.25], neighbour_distances=neighbours)
+
+    # 90th percentile of the sampled nearest-neighbour distances
+    assert pipeline.calibrate_threshold("default") == pytest.approx(1.05)
+    assert pipeline.retrieve("revenue growth", "default")["distances"] == [0.9, 1.0]
+
+    # Too few samples to calibrate: the configured threshold applies
+    pipeline.vector_store.neighbours = [0.2, 0.3]
+    assert pipeline.calibrate_threshold("default") == RAGPipeline.DEFAULT_RELEVANCE_THRESHOLD
+
+
+class StubTool:
+    def __init__(self):
+        self.calls = []
+
+    def execute(self, **kwargs):
+        self.calls.append(kwargs)
+        return "tool result"
+
+
+@pytest.fixture
+def make_agent(make_pipeline, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+
+    def make(distances):
+        pipeline = make_pipeline(distances)
+        monkeypatch.setattr("src.agent.RAGPipeline", lambda relevance_threshold: pipeline)
+        agent = Agent()
+        agent.tools = {name: StubTool() for name in agent.tools}
+        return agent
+
+    return make
+
+
+def test_web_search_skips_context_generation(make_agent):
+    agent = make_agent([0.5, 0.6])
+
+    result = agent.execute_query("latest news on the company", "default", tool_name="search_web")
+
+    assert result["tool_used"] == "search_web"
+    assert agent.rag_pipeline.model.calls == 0
+    assert agent.rag_pipeline.get_metrics()["model_calls_saved"] == 1
+
+
+def test_document_tools_get_generated_context(make_agent):
+    agent = make_agent([1.6, 1.7])
+
+    result = agent.execute_query("summarize this", "default", tool_name="summarize")
+
+    assert result["context"] == "answer"
+    assert agent.tools["summarize"].calls[0]["content"] == "answer"
+    assert agent.rag_pipeline.get_metrics()["gate_bypassed"] == 1
@@ -0,0 +1,119 @@
+import pytest
+
+SECTIONS = [
+    f"Section {n}: the segment reported {label} growth driven by {driver} across {region}."
+    for n, (label, driver, region) in enumerate([
+        ("strong", "pricing", "North America"),
+        ("modest", "volume", "Europe"),
+        ("flat", "mix", "Asia Pacific"),
+        ("negative", "currency", "Latin America"),
+        ("record", "new contracts", "the Middle East"),
+        ("steady", "services", "Africa"),
+    ])
+]
+
+
+def _rows(store, name="docs"):
+    return store.client.collections[name].rows
+
+
+def _bounded(call):
+    """A get() that cannot return a whole document or collection at once."""
+    return call["ids"] is not None or call["limit"] is not None or "$in" in str(call["where"]) \
+        or "seq" in str(call["where"])
+
+
+def test_replace_keeps_unchanged_chunks_and_drops_old_ones(store):
+    store.replace_document("docs", "a.txt", SECTIONS[:3], id_prefix="v1", batch_size=2)
+    changed = [SECTIONS[0], SECTIONS[3], SECTIONS[2]]
+    stats = store.replace_document("docs", "a.txt", changed, id_prefix="v2", batch_size=2)
+
+    rows = _rows(store)
+    assert sorted(document for document, _ in rows.values()) == sorted(changed)
+    assert {meta["version"] for _, meta in rows.values()} == {"v2"}
+    assert stats["chunks_reused"] == 2
+    assert stats["chunks_stored"] == 1
+
+
+def test_replace_looks_up_old_chunks_per_batch(store):
+    store.replace_document("docs", "a.txt", SECTIONS, id_prefix="v1", batch_size=2)
+    collection = store.client.collections["docs"]
+    collection.calls.clear()
+
+    store.replace_document("docs", "a.txt", reversed(SECTIONS), id_prefix="v2", batch_size=2)
+
+    assert collection.calls
+    assert all(_bounded(call) for call in collection.calls)
+    assert all(call["offset"] == 0 for call in collection.calls)
+
+
+def test_failed_replace_leaves_previous_version(store):
+    store.replace_document("docs", "a.txt", SECTIONS[:3], id_prefix="v1", batch_size=2)
+    before = {document for document, _ in _rows(store).values()}
+
+    def failing():
+        yield SECTIONS[0]
+        yield SECTIONS[4]
+        yield SECTIONS[5]
+        raise RuntimeError("extraction failed")
+
+    with pytest.raises(RuntimeError):
+        store.replace_document("docs", "a.txt", failing(), id_prefix="v2", batch_size=2)
+
+    assert {document for document, _ in _rows(store).values()} == before
+    assert not any(chunk_id.startswith("v2_") for chunk_id in _rows(store))
+
+    store.replace_document("docs", "a.txt", SECTIONS[3:], id_prefix="v3", batch_size=2)
+    assert sorted(document for document, _ in _rows(store).values()) == sorted(SECTIONS[3:])
+
+
+def test_delete_hands_shared_chunks_over(store):
+    store.replace_document("docs", "a.txt", SECTIONS[:2], id_prefix="a1")
+    store.replace_document("docs", "b.txt", SECTIONS[1:3], id_prefix="b1")
+    assert store.list_documents("docs") == ["a.txt", "b.txt"]
+
+    assert store.delete_document("docs", "a.txt") == 2
+    rows = _rows(store)
+    assert sorted(document for document, _ in rows.values()) == sorted(SECTIONS[1:3])
+    assert {meta["source"] for _, meta in rows.values()} == {"b.txt"}
+    assert all(meta["references"] == "" for _, meta in rows.values())
+    assert store.list_documents("docs") == ["b.txt"]
+
+
+def test_list_documents_reads_the_registry(store):
+    store.replace_document("docs", "a.txt", SECTIONS[:2], id_prefix="a1")
+    collection = store.client.collections["docs"]
+    collection.calls.clear()
+
+    assert store.list_documents("docs") == ["a.txt"]
+    assert store.has_document("docs", "a.txt")
+    assert not collection.calls
+
+
+def test_registry_is_built_for_existing_collections(store):
+    collection = store.client.create_collection("docs")
+    collection.add(
+        ids=["doc_0", "doc_1"],
+        documents=SECTIONS[:2],
+        metadatas=[{"source": "old.txt"}, {"source": "old.txt"}]
+    )
+
+    assert store.list_documents("docs") == ["old.txt"]
+    assert sorted(meta["seq"] for _, meta in collection.rows.values()) == [0, 1]
+
+    stats = store.replace_document("docs", "old.txt", SECTIONS[1:3], id_prefix="v2")
+    assert stats["chunks_reused"] == 1
+    assert sorted(document for document, _ in _rows(store).values()) == sorted(SECTIONS[1:3])
+
+
+def test_compaction_keeps_chunks_and_renumbers(store):
+    store.replace_document("docs", "a.txt", SECTIONS[:4], id_prefix="a1")
+    store.replace_document("docs", "b.txt", SECTIONS[4:], id_prefix="b1")
+    store.delete_document("docs", "a.txt")
+
+    assert store.compact_collection("docs") == 2
+    assert list(store.client.collections) == ["docs"]
+    rows = _rows(store)
+    assert sorted(document for document, _ in rows.values()) == sorted(SECTIONS[4:])
+    assert sorted(meta["seq"] for _, meta in rows.values()) == [0, 1]
+    assert store.list_documents("docs") == ["b.txt"]
@@ -0,0 +1,124 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from src.web_search import DuckDuckGoSearchBackend, HTTPCache, WebFetcher
+
+LARGE_PAGE = "<html><body>" + "".join(
+    f"<p>Paragraph {i} of the annual report discusses segment revenue and margins.</p>" for i in range(24000)
+) + "<p>END OF REPORT</p></body></html>"
+
+ETAG = '"report-v1"'
+LAST_MODIFIED = "Wed, 01 May 2024 10:00:00 GMT"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    requests = []
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=b"", content_type="text/html; charset=utf-8", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        # Write in pieces so the client sees the body arrive over several reads
+        for start in range(0, len(body), 16 * 1024):
+            self.wfile.write(body[start:start + 16 * 1024])
+            self.wfile.flush()
+
+    def do_GET(self):
+        _Handler.requests.append((self.path, dict(self.headers)))
+        if self.path == "/large":
+            self._send(200, LARGE_PAGE.encode("utf-8"))
+        elif self.path == "/cached":
+            if self.headers.get("If-None-Match") == ETAG:
+                self._send(304)
+            else:
+                self._send(200, b"<html><body><p>Quarterly outlook unchanged.</p></body></html>",
+                           headers={"ETag": ETAG, "Last-Modified": LAST_MODIFIED})
+        elif self.path == "/plain":
+            self._send(200, b"Plain text filing.", content_type="text/plain")
+        elif self.path.startswith("/html/"):
+            target = quote("https://example.com/annual-report?year=2024", safe="")
+            results = (
+                f'<a class="result__a" href="//duckduckgo.com/l/?uddg={target}&rut=abc">Annual report</a>'
+                '<a class="result__a" href="https://example.org/direct">Direct result</a>'
+                '<a class="result__snippet" href="https://example.net/snippet">Snippet</a>'
+            )
+            self._send(200, f"<html><body>{results}</body></html>".encode("utf-8"))
+        else:
+            self._send(500, b"server error")
+
+
+@pytest.fixture
+def server():
+    _Handler.requests = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def fetcher(server, tmp_path):
+    backend = DuckDuckGoSearchBackend(endpoint=f"{server}/html/")
+    return WebFetcher(backend=backend, cache=HTTPCache(str(tmp_path)))
+
+
+def test_large_page_is_read_in_full(fetcher, server):
+    assert len(LARGE_PAGE) > 2 * fetcher.READ_CHUNK_SIZE
+
+    page, = fetcher.fetch([f"{server}/large"])
+
+    assert page["text"].startswith("Paragraph 0 ")
+    assert page["text"].endswith("END OF REPORT")
+    assert page["text"].count("\n") == 24000
+    assert fetcher.cache.get(f"{server}/large")["text"] == page["text"]
+
+
+def test_page_over_the_size_limit_is_truncated(server, tmp_path):
+    fetcher = WebFetcher(cache=HTTPCache(str(tmp_path)), max_page_bytes=100 * 1024)
+
+    page, = fetcher.fetch([f"{server}/large"])
+
+    assert "END OF REPORT" not in page["text"]
+    assert 0 < len(page["text"]) < 100 * 1024
+
+
+def test_second_fetch_revalidates_and_uses_cache(fetcher, server):
+    url = f"{server}/cached"
+    first, = fetcher.fetch([url])
+    second, = fetcher.fetch([url])
+
+    headers = _Handler.requests[-1][1]
+    assert headers["If-None-Match"] == ETAG
+    assert headers["If-Modified-Since"] == LAST_MODIFIED
+    assert not first["from_cache"]
+    assert second["from_cache"]
+    assert second["text"] == first["text"] == "Quarterly outlook unchanged."
+
+
+def test_failing_urls_are_skipped(fetcher, server):
+    pages = fetcher.fetch([f"{server}/broken", f"{server}/plain", "http://127.0.0.1:1/unreachable"])
+
+    assert [page["url"] for page in pages] == [f"{server}/plain"]
+    assert pages[0]["text"] == "Plain text filing."
+
+
+def test_duckduckgo_backend_decodes_redirect_links(fetcher, server):
+    search = fetcher._with_session(lambda session: fetcher.backend.search(session, "annual report", 5))
+    urls = asyncio.run(search)
+
+    assert urls == ["https://example.com/annual-report?year=2024", "https://example.org/direct"]
+    assert _Handler.requests[-1][0] == "/html/?q=annual+report"